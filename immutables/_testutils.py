@@ -1,4 +1,6 @@
 class HashKey:
+    __slots__ = ('name', 'hash', 'error_on_eq_to')
+
     _crasher = None
 
     def __init__(self, hash, name, *, error_on_eq_to=None):
@@ -8,21 +10,27 @@ class HashKey:
         self.error_on_eq_to = error_on_eq_to
 
     def __repr__(self):
-        if self._crasher is not None and self._crasher.error_on_repr:
+        crasher = self._crasher
+        if crasher is not None and crasher.error_on_repr:
             raise ReprError
         return '<Key name:{} hash:{}>'.format(self.name, self.hash)
 
     def __hash__(self):
-        if self._crasher is not None and self._crasher.error_on_hash:
+        crasher = self._crasher
+        if crasher is not None and crasher.error_on_hash:
             raise HashingError
 
         return self.hash
 
     def __eq__(self, other):
+        if self is other:
+            return True
+
         if not isinstance(other, HashKey):
             return NotImplemented
 
-        if self._crasher is not None and self._crasher.error_on_eq:
+        crasher = self._crasher
+        if crasher is not None and crasher.error_on_eq:
             raise EqError
 
         if self.error_on_eq_to is not None and self.error_on_eq_to is other:
@@ -30,28 +38,33 @@ class HashKey:
         if other.error_on_eq_to is not None and other.error_on_eq_to is self:
             raise ValueError('cannot compare {!r} to {!r}'.format(other, self))
 
-        return (self.name, self.hash) == (other.name, other.hash)
+        return self.hash == other.hash and self.name == other.name
 
 
 class KeyStr(str):
+    __slots__ = ()
 
     def __hash__(self):
-        if HashKey._crasher is not None and HashKey._crasher.error_on_hash:
+        crasher = HashKey._crasher
+        if crasher is not None and crasher.error_on_hash:
             raise HashingError
         return super().__hash__()
 
     def __eq__(self, other):
-        if HashKey._crasher is not None and HashKey._crasher.error_on_eq:
+        crasher = HashKey._crasher
+        if crasher is not None and crasher.error_on_eq:
             raise EqError
         return super().__eq__(other)
 
     def __repr__(self, other):
-        if HashKey._crasher is not None and HashKey._crasher.error_on_repr:
+        crasher = HashKey._crasher
+        if crasher is not None and crasher.error_on_repr:
             raise ReprError
         return super().__eq__(other)
 
 
 class HashKeyCrasher:
+    __slots__ = ('error_on_hash', 'error_on_eq', 'error_on_repr')
 
     def __init__(self, *, error_on_hash=False, error_on_eq=False,
                  error_on_repr=False):
@@ -27,16 +27,22 @@ def map_mask(hash, shift):
 
 
 def map_bitpos(hash, shift):
-    return 1 << map_mask(hash, shift)
+    # Inlined map_mask() -- this is the hottest helper and the extra
+    # Python-level call is pure overhead.
+    return 1 << ((hash >> shift) & 0x01f)
 
 
-def map_bitcount(v):
-    v = v - ((v >> 1) & 0x55555555)
-    v = (v & 0x33333333) + ((v >> 2) & 0x33333333)
-    v = (v & 0x0F0F0F0F) + ((v >> 4) & 0x0F0F0F0F)
-    v = v + (v >> 8)
-    v = (v + (v >> 16)) & 0x3F
-    return v
+if sys.version_info >= (3, 10):
+    def map_bitcount(v):
+        return v.bit_count()
+else:
+    def map_bitcount(v):
+        v = v - ((v >> 1) & 0x55555555)
+        v = (v & 0x33333333) + ((v >> 2) & 0x33333333)
+        v = (v & 0x0F0F0F0F) + ((v >> 4) & 0x0F0F0F0F)
+        v = v + (v >> 8)
+        v = (v + (v >> 16)) & 0x3F
+        return v
 
 
 def map_bitindex(bitmap, bit):
@@ -68,7 +74,13 @@ class BitmapNode:
     def clone(self, mutid):
         return BitmapNode(self.size, self.bitmap, self.array.copy(), mutid)
 
-    def assoc(self, shift, hash, key, val, mutid):
+    # The keyword-only defaults below pre-bind the module-level helpers
+    # and the _NULL sentinel so the hot methods read them with LOAD_FAST
+    # instead of a LOAD_GLOBAL per call.
+
+    def assoc(self, shift, hash, key, val, mutid, *,
+              map_bitpos=map_bitpos, map_bitindex=map_bitindex,
+              map_bitcount=map_bitcount, map_hash=map_hash, _NULL=_NULL):
         bit = map_bitpos(hash, shift)
         idx = map_bitindex(self.bitmap, bit)
 
@@ -135,10 +147,8 @@ class BitmapNode:
 
             n = map_bitcount(self.bitmap)
 
-            new_array = self.array[:key_idx]
-            new_array.append(key)
-            new_array.append(val)
-            new_array.extend(self.array[key_idx:])
+            new_array = self.array.copy()
+            new_array[key_idx:key_idx] = (key, val)
 
             if mutid and mutid == self.mutid:
                 self.size = 2 * (n + 1)
@@ -149,7 +159,8 @@ class BitmapNode:
                 return BitmapNode(
                     2 * (n + 1), self.bitmap | bit, new_array, mutid), True
 
-    def find(self, shift, hash, key):
+    def find(self, shift, hash, key, *,
+             map_bitpos=map_bitpos, map_bitindex=map_bitindex, _NULL=_NULL):
         bit = map_bitpos(hash, shift)
 
         if not (self.bitmap & bit):
@@ -170,7 +181,9 @@ class BitmapNode:
 
         raise KeyError(key)
 
-    def without(self, shift, hash, key, mutid):
+    def without(self, shift, hash, key, mutid, *,
+                map_bitpos=map_bitpos, map_bitindex=map_bitindex,
+                _NULL=_NULL):
         bit = map_bitpos(hash, shift)
         if not (self.bitmap & bit):
             return W_NOT_FOUND, None
@@ -220,8 +233,8 @@ class BitmapNode:
                 if self.size == 2:
                     return W_EMPTY, None
 
-                new_array = self.array[:key_idx]
-                new_array.extend(self.array[val_idx + 1:])
+                new_array = self.array.copy()
+                del new_array[key_idx:val_idx + 1]
 
                 if mutid and mutid == self.mutid:
                     self.size -= 2
@@ -236,35 +249,79 @@ class BitmapNode:
             else:
                 return W_NOT_FOUND, None
 
+    # The iteration methods below traverse the trie with an explicit
+    # stack instead of `yield from` recursion: one live generator per
+    # walk instead of one per trie level.  Sub-nodes are walked through
+    # their arrays directly -- CollisionNode uses the same interleaved
+    # [key, val, ...] layout and never stores the _NULL sentinel.
+
     def keys(self):
-        for i in range(0, self.size, 2):
-            key_or_null = self.array[i]
+        array = self.array
+        n = len(array)
+        stack = []
+        i = 0
+        while True:
+            while i < n:
+                key_or_null = array[i]
+
+                if key_or_null is _NULL:
+                    stack.append((array, n, i + 2))
+                    array = array[i + 1].array
+                    n = len(array)
+                    i = 0
+                else:
+                    yield key_or_null
+                    i += 2
 
-            if key_or_null is _NULL:
-                val_or_node = self.array[i + 1]
-                yield from val_or_node.keys()
-            else:
-                yield key_or_null
+            if not stack:
+                return
+            array, n, i = stack.pop()
 
     def values(self):
-        for i in range(0, self.size, 2):
-            key_or_null = self.array[i]
-            val_or_node = self.array[i + 1]
+        array = self.array
+        n = len(array)
+        stack = []
+        i = 0
+        while True:
+            while i < n:
+                key_or_null = array[i]
+                val_or_node = array[i + 1]
+
+                if key_or_null is _NULL:
+                    stack.append((array, n, i + 2))
+                    array = val_or_node.array
+                    n = len(array)
+                    i = 0
+                else:
+                    yield val_or_node
+                    i += 2
 
-            if key_or_null is _NULL:
-                yield from val_or_node.values()
-            else:
-                yield val_or_node
+            if not stack:
+                return
+            array, n, i = stack.pop()
 
     def items(self):
-        for i in range(0, self.size, 2):
-            key_or_null = self.array[i]
-            val_or_node = self.array[i + 1]
+        array = self.array
+        n = len(array)
+        stack = []
+        i = 0
+        while True:
+            while i < n:
+                key_or_null = array[i]
+                val_or_node = array[i + 1]
+
+                if key_or_null is _NULL:
+                    stack.append((array, n, i + 2))
+                    array = val_or_node.array
+                    n = len(array)
+                    i = 0
+                else:
+                    yield key_or_null, val_or_node
+                    i += 2
 
-            if key_or_null is _NULL:
-                yield from val_or_node.items()
-            else:
-                yield key_or_null, val_or_node
+            if not stack:
+                return
+            array, n, i = stack.pop()
 
     def dump(self, buf, level):  # pragma: no cover
         buf.append(
@@ -285,6 +342,12 @@ class BitmapNode:
                 buf.append(pad + '{!r}: {!r}'.format(key_or_null, val_or_node))
 
 
+# Shared root for all empty Maps.  Safe because nodes created with
+# mutid=0 are never mutated in place -- every assoc/without on them
+# clones first.
+_EMPTY_NODE = BitmapNode(0, 0, [], 0)
+
+
 class CollisionNode:
 
     def __init__(self, size, hash, array, mutid):
@@ -294,14 +357,18 @@ class CollisionNode:
         self.mutid = mutid
 
     def find_index(self, key):
+        # The identity check mirrors PyObject_RichCompareBool() in the
+        # C implementation: same object means equal, no __eq__ call.
         for i in range(0, self.size, 2):
-            if self.array[i] == key:
+            k = self.array[i]
+            if k is key or k == key:
                 return i
         return -1
 
     def find(self, shift, hash, key):
         for i in range(0, self.size, 2):
-            if self.array[i] == key:
+            k = self.array[i]
+            if k is key or k == key:
                 return self.array[i + 1]
         raise KeyError(key)
 
@@ -364,8 +431,8 @@ class CollisionNode:
                 2, map_bitpos(hash, shift), new_array, mutid)
             return W_NEWNODE, new_node
 
-        new_array = self.array[:key_idx]
-        new_array.extend(self.array[key_idx + 2:])
+        new_array = self.array.copy()
+        del new_array[key_idx:key_idx + 2]
         if mutid and mutid == self.mutid:
             self.array = new_array
             self.size -= 2
@@ -401,6 +468,77 @@ class CollisionNode:
             buf.append('{}{!r}: {!r}'.format(pad, key, val))
 
 
+def _map_eq(a, b):
+    # Per-key comparison of two same-sized tries: look every key of `a`
+    # up in `b`.  Used when the lock-step walk below is inconclusive.
+    for key, val in a.items():
+        try:
+            b_val = b.find(0, map_hash(key), key)
+        except KeyError:
+            return False
+        if val is not b_val and val != b_val:
+            return False
+    return True
+
+
+def _node_eq(a, b):
+    # Compare two tries in lock-step.  Maps derived from a common
+    # ancestor share whole subtrees, which the identity check skips
+    # without descending.  The trie shape is not canonical, though:
+    # deleting from next to a collision bucket can leave the bucket
+    # wrapped in single-entry BitmapNodes that a freshly built map does
+    # not have.  A structural mismatch therefore proves nothing -- it
+    # returns None and the caller falls back to _map_eq() -- and only
+    # identity and per-slot key/value comparisons count as evidence.
+    if a is b:
+        return True
+
+    if type(a) is not type(b):
+        return None
+
+    if type(a) is BitmapNode:
+        if a.bitmap != b.bitmap:
+            return None
+
+        a_array = a.array
+        b_array = b.array
+        for i in range(0, a.size, 2):
+            a_key = a_array[i]
+            b_key = b_array[i]
+            a_val = a_array[i + 1]
+            b_val = b_array[i + 1]
+
+            if a_key is _NULL or b_key is _NULL:
+                if a_key is not b_key:
+                    return None
+                sub_eq = _node_eq(a_val, b_val)
+                if sub_eq is not True:
+                    return sub_eq
+            else:
+                if a_key is not b_key and a_key != b_key:
+                    return False
+                if a_val is not b_val and a_val != b_val:
+                    return False
+
+        return True
+
+    else:
+        if a.hash != b.hash or a.size != b.size:
+            return False
+
+        # Collision entries are not ordered; match them key by key.
+        for i in range(0, a.size, 2):
+            try:
+                b_val = b.find(0, a.hash, a.array[i])
+            except KeyError:
+                return False
+            a_val = a.array[i + 1]
+            if a_val is not b_val and a_val != b_val:
+                return False
+
+        return True
+
+
 class MapKeys:
 
     def __init__(self, c, m):
@@ -413,6 +551,15 @@ class MapKeys:
     def __iter__(self):
         return iter(self.__root.keys())
 
+    def __contains__(self, key):
+        # O(log N) trie lookup instead of the default O(N) iteration.
+        try:
+            self.__root.find(0, map_hash(key), key)
+        except KeyError:
+            return False
+        else:
+            return True
+
 
 class MapValues:
 
@@ -439,6 +586,18 @@ class MapItems:
     def __iter__(self):
         return iter(self.__root.items())
 
+    def __contains__(self, item):
+        # Like dict_items, only a 2-tuple can match; any other iterable
+        # of length two is not considered an item.
+        if not isinstance(item, tuple) or len(item) != 2:
+            return False
+        key, val = item
+        try:
+            found = self.__root.find(0, map_hash(key), key)
+        except KeyError:
+            return False
+        return found is val or found == val
+
 
 class Map:
 
@@ -454,7 +613,7 @@ class Map:
             )
 
         self.__count = 0
-        self.__root = BitmapNode(0, 0, [], 0)
+        self.__root = _EMPTY_NODE
         self.__hash = -1
 
         if isinstance(col, Map):
@@ -491,16 +650,10 @@ class Map:
         if len(self) != len(other):
             return False
 
-        for key, val in self.__root.items():
-            try:
-                oval = other.__root.find(0, map_hash(key), key)
-            except KeyError:
-                return False
-            else:
-                if oval != val:
-                    return False
-
-        return True
+        eq = _node_eq(self.__root, other.__root)
+        if eq is None:
+            eq = _map_eq(self.__root, other.__root)
+        return eq
 
     def update(self, *args, **kw):
         if not args:
@@ -622,17 +775,19 @@ class Map:
 
         MAX = sys.maxsize
         MASK = 2 * MAX + 1
+        XOR = 89869747
+        MUL = 3644798167
 
         h = 1927868237 * (self.__count * 2 + 1)
         h &= MASK
 
         for key, value in self.__root.items():
             hx = hash(key)
-            h ^= (hx ^ (hx << 16) ^ 89869747) * 3644798167
+            h ^= (hx ^ (hx << 16) ^ XOR) * MUL
             h &= MASK
 
             hx = hash(value)
-            h ^= (hx ^ (hx << 16) ^ 89869747) * 3644798167
+            h ^= (hx ^ (hx << 16) ^ XOR) * MUL
             h &= MASK
 
         h = h * 69069 + 907133923
@@ -837,16 +992,10 @@ class MapMutation:
         if len(self) != len(other):
             return False
 
-        for key, val in self.__root.items():
-            try:
-                oval = other.__root.find(0, map_hash(key), key)
-            except KeyError:
-                return False
-            else:
-                if oval != val:
-                    return False
-
-        return True
+        eq = _node_eq(self.__root, other.__root)
+        if eq is None:
+            eq = _map_eq(self.__root, other.__root)
+        return eq
 
 
 collections.abc.Mapping.register(Map)
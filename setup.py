@@ -1,41 +1,81 @@
+import ast
 import os
 import platform
+import sys
+
 import setuptools
 
 
-# Minimal dependencies required to test immutables.
-TEST_DEPENDENCIES = [
-    # pycodestyle is a dependency of flake8, but it must be frozen because
-    # their combination breaks too often
-    # (example breakage: https://gitlab.com/pycqa/flake8/issues/427)
-    'flake8~=3.8.4',
-    'pycodestyle~=2.6.0',
-]
+# Project metadata lives in pyproject.toml; setup.py only handles the
+# version and the C extension build.
+
+DEBUG = os.environ.get("DEBUG_IMMUTABLES") == '1'
 
-EXTRA_DEPENDENCIES = {
-    'test': TEST_DEPENDENCIES,
-}
+LFLAGS = []
 
-CFLAGS = ['-O2']
-if platform.uname().system != 'Windows':
-    CFLAGS.extend(['-std=c99', '-fsigned-char', '-Wall',
-                   '-Wsign-compare', '-Wconversion'])
+if platform.system() != 'Windows':
+    # Release builds get the extra inlining and unrolling of -O3 for
+    # the HAMT hot paths; debug builds stay at -O0 to be debuggable.
+    CFLAGS = ['-O0'] if DEBUG else ['-O3']
+    CFLAGS.extend(['-std=c99', '-fsigned-char'])
+    if DEBUG:
+        # Developer diagnostics; release build logs stay quiet.
+        CFLAGS.extend(['-Wall', '-Wsign-compare', '-Wconversion'])
+    # Only PyInit__map needs to be visible; hiding everything else
+    # avoids PLT indirection for intra-module calls.  PyMODINIT_FUNC
+    # only marks the init function default-visibility on Python 3.9+;
+    # on 3.7/3.8 the flag would hide PyInit__map itself and break the
+    # import.
+    if sys.version_info >= (3, 9):
+        CFLAGS.append('-fvisibility=hidden')
+    if not DEBUG:
+        # Let the compiler inline across the whole extension.
+        CFLAGS.append('-flto')
+        LFLAGS.append('-flto')
+        # Like CPython itself: calls between _map.c's own functions must
+        # not go through the PLT just to allow symbol interposition.
+        CFLAGS.append('-fno-semantic-interposition')
+    if os.environ.get("IMMUTABLES_NATIVE") == '1':
+        # Opt-in tuning for the build machine (enables POPCNT/BMI on
+        # x86).  Wheels must stay on the portable baseline, so this is
+        # never on by default.
+        CFLAGS.append('-march=native')
+    PGO = os.environ.get("IMMUTABLES_PGO")
+    if PGO == 'generate':
+        # Two-step profile-guided optimization:
+        #   IMMUTABLES_PGO=generate python setup.py build_ext --inplace
+        #   python -m unittest discover -s tests   # collects ./pgo data
+        #   IMMUTABLES_PGO=use python setup.py build_ext --inplace -f
+        CFLAGS.append('-fprofile-generate=./pgo')
+        LFLAGS.append('-fprofile-generate=./pgo')
+    elif PGO == 'use':
+        CFLAGS.extend(['-fprofile-use=./pgo', '-fprofile-correction'])
+        LFLAGS.append('-fprofile-use=./pgo')
+else:
+    if DEBUG:
+        CFLAGS = ['/Od']
+    else:
+        # /Oi expands popcount and friends as intrinsics; /GL + /LTCG is
+        # MSVC's whole-program optimization, the LTO equivalent above.
+        # /arch:AVX2 is deliberately not used: wheels must run on the
+        # portable baseline.
+        CFLAGS = ['/O2', '/Oi', '/GL']
+        LFLAGS.append('/LTCG')
 
 
 with open(os.path.join(
         os.path.dirname(__file__), 'immutables', '_version.py')) as f:
-    for line in f:
-        if line.startswith('__version__ ='):
-            _, _, version = line.partition('=')
-            VERSION = version.strip(" \n'\"")
-            break
-    else:
+    _, sep, version = f.read().partition('__version__ =')
+    if not sep:
         raise RuntimeError(
             'unable to read the version from immutables/_version.py')
+    VERSION = ast.literal_eval(version.partition('\n')[0].strip())
+
 
+CYTHONIZE = os.environ.get("IMMUTABLES_CYTHONIZE") == '1'
 
 if platform.python_implementation() == 'CPython':
-    if os.environ.get("DEBUG_IMMUTABLES") == '1':
+    if DEBUG:
         define_macros = []
         undef_macros = ['NDEBUG']
     else:
@@ -47,6 +87,7 @@ if platform.python_implementation() == 'CPython':
             "immutables._map",
             ["immutables/_map.c"],
             extra_compile_args=CFLAGS,
+            extra_link_args=LFLAGS,
             define_macros=define_macros,
             undef_macros=undef_macros)
     ]
@@ -54,37 +95,23 @@ else:
     ext_modules = []
 
 
-with open(os.path.join(os.path.dirname(__file__), 'README.rst')) as f:
-    readme = f.read()
+if CYTHONIZE:
+    # Optionally compile the pure-Python fallback with Cython.  This is
+    # never required -- immutables/map.py always works interpreted -- and
+    # it is strictly opt-in: build output must not depend on whether
+    # Cython happens to be installed, and on PyPy a cpyext extension is
+    # typically slower than the interpreted fallback.
+    try:
+        from Cython.Build import cythonize
+    except ImportError:
+        raise RuntimeError(
+            'IMMUTABLES_CYTHONIZE=1 requires Cython to be installed')
+    ext_modules += cythonize(
+        ['immutables/map.py'],
+        compiler_directives={'language_level': 3})
 
 
 setuptools.setup(
-    name='immutables',
     version=VERSION,
-    description='Immutable Collections',
-    long_description=readme,
-    python_requires='>=3.5',
-    classifiers=[
-        'License :: OSI Approved :: Apache Software License',
-        'Intended Audience :: Developers',
-        'Programming Language :: Python :: 3 :: Only',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
-        'Programming Language :: Python :: 3.7',
-        'Programming Language :: Python :: 3.8',
-        'Programming Language :: Python :: 3.9',
-        'Operating System :: POSIX',
-        'Operating System :: MacOS :: MacOS X',
-        'Operating System :: Microsoft :: Windows',
-    ],
-    author='MagicStack Inc',
-    author_email='hello@magic.io',
-    url='https://github.com/MagicStack/immutables',
-    license='Apache License, Version 2.0',
-    packages=['immutables'],
-    package_data={"immutables": ["py.typed", "*.pyi"]},
-    provides=['immutables'],
-    include_package_data=True,
     ext_modules=ext_modules,
-    extras_require=EXTRA_DEPENDENCIES,
 )
@@ -3,10 +3,19 @@ import sys
 import unittest
 
 
+TEST_MODULES = [
+    'test_map',
+    'test_issue24',
+    'test_none_keys',
+]
+
+
 def suite():
+    test_path = os.path.dirname(__file__)
+    if test_path not in sys.path:
+        sys.path.insert(0, test_path)
     test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover(os.path.dirname(__file__),
-                                      pattern='test_*.py')
+    test_suite = test_loader.loadTestsFromNames(TEST_MODULES)
     return test_suite
 
 
@@ -11,13 +11,19 @@ class CollisionKey:
 class Issue24Base:
     Map = None
 
+    @classmethod
+    def setUpClass(cls):
+        # Tuples of (key, value) pairs: the Map constructor consumes them
+        # directly, without the intermediate dict a fromkeys() call would
+        # allocate.
+        cls._entries27 = tuple((k, True) for k in range(27))
+        cls._entries7 = tuple((k, True) for k in range(7))
+
     def test_issue24(self):
-        keys = range(27)
-        new_entries = dict.fromkeys(keys, True)
-        m = self.Map(new_entries)
+        m = self.Map(self._entries27)
         self.assertTrue(17 in m)
         with m.mutate() as mm:
-            for i in keys:
+            for i, _ in self._entries27:
                 del mm[i]
             self.assertEqual(len(mm), 0)
 
@@ -45,9 +51,7 @@ class Issue24Base:
         self.dump_check_node_size(header, 2 * count)
 
     def test_bitmap_node_update_in_place_count(self):
-        keys = range(7)
-        new_entries = dict.fromkeys(keys, True)
-        m = self.Map(new_entries)
+        m = self.Map(self._entries7)
         d = m.__dump__().splitlines()
         self.assertTrue(d)
         if d[0].startswith('HAMT'):
@@ -57,9 +61,7 @@ class Issue24Base:
         self.dump_check_bitmap_node_count(header, 7)
 
     def test_bitmap_node_delete_in_place_count(self):
-        keys = range(7)
-        new_entries = dict.fromkeys(keys, True)
-        m = self.Map(new_entries)
+        m = self.Map(self._entries7)
         with m.mutate() as mm:
             del mm[0], mm[2], mm[3]
             m2 = mm.finish()
@@ -72,8 +74,7 @@ class Issue24Base:
         self.dump_check_bitmap_node_count(header, 4)
 
     def test_collision_node_update_in_place_count(self):
-        keys = (CollisionKey() for i in range(7))
-        new_entries = dict.fromkeys(keys, True)
+        new_entries = tuple((CollisionKey(), True) for i in range(7))
         m = self.Map(new_entries)
         d = m.__dump__().splitlines()
         self.assertTrue(len(d) > 3)
@@ -87,7 +88,7 @@ class Issue24Base:
 
     def test_collision_node_delete_in_place_count(self):
         keys = [CollisionKey() for i in range(7)]
-        new_entries = dict.fromkeys(keys, True)
+        new_entries = tuple((k, True) for k in keys)
         m = self.Map(new_entries)
         with m.mutate() as mm:
             del mm[keys[0]], mm[keys[2]], mm[keys[3]]
@@ -124,9 +125,7 @@ class Issue24CTest(Issue24Base, unittest.TestCase):
         return d[1]
 
     def test_array_node_update_in_place_count(self):
-        keys = range(27)
-        new_entries = dict.fromkeys(keys, True)
-        m = self.Map(new_entries)
+        m = self.Map(self._entries27)
         header = self.hamt_dump_check_first_return_second(m)
         self.dump_check_node_kind(header, 'Array')
         for i in range(2, 18):
@@ -135,9 +134,7 @@ class Issue24CTest(Issue24Base, unittest.TestCase):
         self.dump_check_bitmap_node_count(header, 11)
 
     def test_array_node_delete_in_place_count(self):
-        keys = range(27)
-        new_entries = dict.fromkeys(keys, True)
-        m = self.Map(new_entries)
+        m = self.Map(self._entries27)
         header = self.hamt_dump_check_first_return_second(m)
         self.dump_check_node_kind(header, 'Array')
         with m.mutate() as mm:
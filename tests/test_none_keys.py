@@ -17,6 +17,8 @@ assert(len(none_collisions) == 7)
 none_collisions = [h | (not_collision & (mask << shift))
                    for shift, h in zip(range(5, 37, 5), none_collisions)]
 
+_EXPECTED_VALUES = frozenset((-1, 2, 4, 9))
+
 
 class NoneCollision(HashKey):
     def __init__(self, name, level):
@@ -35,9 +37,25 @@ class NoneCollision(HashKey):
 class BaseNoneTest:
     Map = None
 
+    @classmethod
+    def setUpClass(cls):
+        # NoneCollision construction is not free -- it computes the
+        # collision hash for the requested level -- so build the shared
+        # fixtures once per class instead of once per test method.
+        cls._collisions = [NoneCollision('a', level) for level in range(7)]
+        cls._indices = [map_mask(none_hash, shift)
+                        for shift in range(0, 32, 5)]
+        cls._key2 = NoneCollision('a', 2)
+        cls._key4 = NoneCollision('b', 4)
+        cls._keym1 = NoneCollision('c', -1)
+        cls._expected_keys = frozenset(
+            (None, cls._keym1, cls._key2, cls._key4))
+        cls._expected_items = frozenset(
+            ((cls._keym1, -1), (cls._key2, 2), (cls._key4, 4), (None, 9)))
+
     def test_none_collisions(self):
-        collisions = [NoneCollision('a', level) for level in range(7)]
-        indices = [map_mask(none_hash, shift) for shift in range(0, 32, 5)]
+        collisions = self._collisions
+        indices = self._indices
 
         for i, c in enumerate(collisions[:-1], 1):
             self.assertNotEqual(c, None)
@@ -63,8 +81,7 @@ class BaseNoneTest:
         self.assertEqual(m[None], 1)
         self.assertEqual(repr(m), 'immutables.Map({None: 1})')
 
-        for level in range(7):
-            key = NoneCollision('a', level)
+        for key in self._collisions:
             self.assertFalse(key in m)
             with self.assertRaises(KeyError):
                 m.delete(key)
@@ -102,8 +119,7 @@ class BaseNoneTest:
             m.delete(None)
 
     def test_none_collision_1(self):
-        for level in range(7):
-            key = NoneCollision('a', level)
+        for key in self._collisions:
             m = self.Map({None: 1, key: 2})
 
             self.assertEqual(len(m), 2)
@@ -245,8 +261,7 @@ class BaseNoneTest:
             m2.delete(key)
 
     def test_none_collision_3(self):
-        for level in range(7):
-            key = NoneCollision('a', level)
+        for key in self._collisions:
             m = self.Map({key: 2})
 
             self.assertEqual(len(m), 1)
@@ -287,8 +302,8 @@ class BaseNoneTest:
                 m2.delete(None)
 
     def test_collision_4(self):
-        key2 = NoneCollision('a', 2)
-        key4 = NoneCollision('b', 4)
+        key2 = self._key2
+        key4 = self._key4
         m = self.Map({key2: 2, key4: 4})
 
         self.assertEqual(len(m), 2)
@@ -367,9 +382,9 @@ class BaseNoneTest:
             m3.delete(key4)
 
     def test_none_mutation(self):
-        key2 = NoneCollision('a', 2)
-        key4 = NoneCollision('b', 4)
-        key = NoneCollision('c', -1)
+        key2 = self._key2
+        key4 = self._key4
+        key = self._keym1
         m = self.Map({key: -1, key2: 2, key4: 4, None: 9})
 
         with m.mutate() as mm:
@@ -455,9 +470,9 @@ class BaseNoneTest:
             self.assertEqual(m2[k], -v)
 
     def test_iterators(self):
-        key2 = NoneCollision('a', 2)
-        key4 = NoneCollision('b', 4)
-        key = NoneCollision('c', -1)
+        key2 = self._key2
+        key4 = self._key4
+        key = self._keym1
         m = self.Map({key: -1, key2: 2, key4: 4, None: 9})
 
         self.assertEqual(len(m), 4)
@@ -472,19 +487,18 @@ class BaseNoneTest:
 
         s = set(m)
         self.assertEqual(len(s), 4)
-        self.assertEqual(s, set([None, key, key2, key4]))
+        self.assertEqual(s, self._expected_keys)
 
         sk = set(m.keys())
         self.assertEqual(s, sk)
 
         sv = set(m.values())
         self.assertEqual(len(sv), 4)
-        self.assertEqual(sv, set([-1, 2, 4, 9]))
+        self.assertEqual(sv, _EXPECTED_VALUES)
 
         si = set(m.items())
         self.assertEqual(len(si), 4)
-        self.assertEqual(si,
-                         set([(key, -1), (key2, 2), (key4, 4), (None, 9)]))
+        self.assertEqual(si, self._expected_items)
 
         d = {key: -1, key2: 2, key4: 4, None: 9}
         self.assertEqual(dict(m.items()), d)